@@ -0,0 +1,361 @@
+"""
+Orchestrate the batch loading pipeline end to end.
+
+Phase 1 splits the generated CSV files into batch files with
+FileSplitter; Phase 2 loads them into Snowflake with
+SnowflakeBatchLoader. Each table uses a different batch size so a single
+run produces a comparison of loading throughput by batch size.
+
+Run `python generate_sample_data.py` first to create the source files,
+then `python batch_load_orchestrator.py` (optionally with --split-only
+or --load-only).
+"""
+
+import argparse
+import copy
+import json
+import os
+import queue
+import re
+import sys
+import threading
+from collections import defaultdict
+from dataclasses import asdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from file_splitter import FileSplitter
+from snowflake_loader import (SnowflakeBatchLoader, TableLoadSummary,
+                              compare_loading_performance,
+                              summarize_load_results)
+
+
+_DEFAULT_CONFIG = {
+    'data_directory': 'test_data',
+    'output_directory': 'batch_files',
+    'results_file': 'load_results.json',
+    'tables': [
+        {'source_file': 'customers.csv', 'table_name': 'customers',
+         'batch_size_mb': 25},
+        {'source_file': 'orders.csv', 'table_name': 'orders',
+         'batch_size_mb': 50},
+        {'source_file': 'products.csv', 'table_name': 'products',
+         'batch_size_mb': 100},
+        {'source_file': 'transactions.csv', 'table_name': 'transactions',
+         'batch_size_mb': 200},
+        {'source_file': 'events.csv', 'table_name': 'events',
+         'batch_size_mb': 250},
+    ],
+    'snowflake': {
+        'account': '<your_account>',
+        'user': '<your_user>',
+        'password': '<your_password>',
+        'warehouse': 'compute_wh',
+        'database': 'batch_loading_db',
+        'schema': 'public',
+        'role': 'accountadmin',
+    },
+}
+
+
+@lru_cache(maxsize=4)
+def _parse_config_file(config_file: str, mtime: float) -> Dict:
+    """Parse a config file once per (path, mtime); cached."""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_config(config_file: Optional[str] = None) -> Dict:
+    """
+    Build the pipeline configuration.
+
+    Starts from the built-in defaults and overlays values from the given
+    JSON config file, if one is provided. Parsed files are cached by
+    (path, mtime), so embedding the orchestrator in a loop (e.g. a
+    batch-size sweep) does not re-parse the same config on every
+    iteration; an edited file is picked up via its new mtime. Callers
+    get deep copies, so mutating a returned config never leaks into the
+    cache or the defaults.
+    """
+    config = copy.deepcopy(_DEFAULT_CONFIG)
+
+    if config_file and Path(config_file).exists():
+        mtime = Path(config_file).stat().st_mtime
+        config.update(copy.deepcopy(_parse_config_file(config_file, mtime)))
+
+    return config
+
+
+# Report layout, built once at import time so the print helpers do not
+# re-parse format specs and re-build separators on every call.
+_HEADER_SEP = "=" * 80
+_TABLE_SEP = "-" * 80
+_ROW_TMPL = "{:<15} {:>10} {:>10} {:>10,} {:>11.2f}s {:>12.2f}"
+_TABLE_HEADER = "{:<15} {:>10} {:>10} {:>10} {:>12} {:>12}".format(
+    "Table", "Batch MB", "Batches", "Rows", "Duration", "MB/s")
+
+
+def print_header(title: str):
+    """Print a section header."""
+    sys.stdout.write(
+        f"\n{_HEADER_SEP}\n{title.center(80)}\n{_HEADER_SEP}\n")
+
+
+def print_summary_table(summaries: List[TableLoadSummary]):
+    """Print the per-table loading summary as a fixed-width table."""
+    body = "\n".join(
+        _ROW_TMPL.format(
+            summary.table_name,
+            summary.batch_size_mb,
+            summary.total_batches,
+            summary.total_rows_loaded,
+            summary.total_duration_seconds,
+            summary.throughput_mb_per_second)
+        for summary in summaries)
+
+    sys.stdout.write(
+        f"\n{_TABLE_SEP}\n{_TABLE_HEADER}\n{_TABLE_SEP}\n"
+        f"{body}\n{_TABLE_SEP}\n")
+
+
+def save_results(results: Dict, output_file: str = 'load_results.json'):
+    """
+    Save pipeline results as JSON.
+
+    Serializes with orjson when it is installed (a C extension, several
+    times faster than the stdlib for result files with many per-batch
+    records); otherwise falls back to json.dump. OPT_NON_STR_KEYS lets
+    orjson accept the integer by_batch_size keys, which both writers
+    emit as JSON strings.
+    """
+    serializable_results = dict(results)
+    serializable_results['load_summaries'] = [
+        asdict(summary) for summary in results.get('load_summaries', [])
+    ]
+
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(
+                serializable_results,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                default=str))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(serializable_results, f, indent=2, default=str)
+
+    print(f"Results saved to {output_file}")
+
+
+def _run_fused_pipeline(config: Dict, splitter: FileSplitter,
+                        loader: SnowflakeBatchLoader, results: Dict):
+    """
+    Split and load concurrently through a bounded queue.
+
+    A producer thread splits the source files and enqueues each batch
+    file as soon as it is written; the consumer PUTs and COPYs batches
+    while later batches are still being split, so the warehouse is never
+    idle waiting for the whole split phase. Successfully loaded batch
+    files are deleted eagerly to keep peak disk usage near
+    queue-depth * batch size.
+    """
+    data_dir = Path(config['data_directory'])
+    work_queue = queue.Queue(maxsize=4)
+    split_errors = []
+
+    def _producer():
+        try:
+            for table_config in config['tables']:
+                table_name = table_config['table_name']
+                source_file = data_dir / table_config['source_file']
+                batch_files = splitter.split_file_by_lines(
+                    str(source_file),
+                    table_config['batch_size_mb'],
+                    table_name,
+                    on_batch=lambda path, table=table_name:
+                        work_queue.put(('batch', table, path)))
+                results['split_results'][table_name] = \
+                    splitter.create_batch_summary(table_name, batch_files)
+                work_queue.put(('table_done', table_name,
+                                table_config['batch_size_mb']))
+        except Exception as e:
+            split_errors.append(e)
+        finally:
+            work_queue.put(None)
+
+    producer = threading.Thread(target=_producer, daemon=True)
+    producer.start()
+
+    stage_names = {}
+    table_results = {}
+    item = True
+
+    try:
+        while True:
+            item = work_queue.get()
+            if item is None:
+                break
+
+            if item[0] == 'batch':
+                _, table_name, batch_path = item
+                if table_name not in stage_names:
+                    stage_names[table_name] = loader.create_stage(table_name)
+                    loader.create_table(table_name)
+                    table_results[table_name] = []
+
+                batch_number = len(table_results[table_name]) + 1
+                result = loader.load_batch_file(
+                    table_name, stage_names[table_name], batch_path,
+                    batch_number)
+                table_results[table_name].append(result)
+                if result.success:
+                    os.unlink(batch_path)
+            else:
+                _, table_name, batch_size_mb = item
+                results['load_summaries'].append(summarize_load_results(
+                    table_name, batch_size_mb,
+                    table_results.get(table_name, [])))
+    finally:
+        # If the consumer bailed out mid-stream (e.g. stage DDL failed),
+        # keep draining until the producer's sentinel arrives so it is
+        # never left blocked on a full queue with the source file open;
+        # on a normal exit the sentinel was already consumed.
+        while item is not None:
+            item = work_queue.get()
+        producer.join()
+
+    if split_errors:
+        raise split_errors[0]
+
+
+def run_batch_loading_pipeline(config: Dict, split_only: bool = False,
+                               load_only: bool = False) -> Dict:
+    """
+    Run the full pipeline: split the source files and load the batches.
+
+    When both phases run, splitting and loading are fused: batches are
+    loaded while later ones are still being split, and loaded batch
+    files are removed eagerly. With split_only or load_only, the single
+    requested phase runs on its own.
+
+    Args:
+        config: Configuration dict (see load_config).
+        split_only: Only split, skip loading into Snowflake.
+        load_only: Skip splitting, load previously split batch files.
+
+    Returns:
+        Dict with split results, load summaries and the batch size
+        comparison.
+    """
+    results = {
+        'split_results': {},
+        'load_summaries': [],
+        'by_batch_size': {},
+    }
+
+    data_dir = Path(config['data_directory'])
+    target_dir = Path(config['output_directory'])
+    splitter = FileSplitter(str(target_dir))
+
+    # Split-only: no Snowflake connection involved.
+    if split_only:
+        print_header("Splitting source files")
+        for table_config in config['tables']:
+            source_file = data_dir / table_config['source_file']
+            batch_files = splitter.split_file_by_lines(
+                str(source_file),
+                table_config['batch_size_mb'],
+                table_config['table_name'])
+            results['split_results'][table_config['table_name']] = \
+                splitter.create_batch_summary(table_config['table_name'],
+                                              batch_files)
+        return results
+
+    loader = SnowflakeBatchLoader(config['snowflake'])
+    loader.connect()
+
+    try:
+        if load_only:
+            print_header("Loading batches into Snowflake")
+            for table_config in config['tables']:
+                table_name = table_config['table_name']
+                table_dir = target_dir / table_name
+
+                manifest_path = table_dir / 'manifest.json'
+                if manifest_path.exists():
+                    batch_files = \
+                        json.loads(manifest_path.read_text())['batches']
+                else:
+                    # Directories split before manifests existed: glob,
+                    # but sort numerically so batch_10 follows batch_9.
+                    batch_files = sorted(
+                        (str(p) for p in
+                         table_dir.glob(f"{table_name}_batch_*.csv*")),
+                        key=lambda p: int(
+                            re.search(r'_batch_(\d+)', p).group(1)))
+                summary = loader.load_table_batches(
+                    table_name, batch_files, table_config['batch_size_mb'],
+                    stage_dir=str(table_dir))
+                results['load_summaries'].append(summary)
+        else:
+            print_header("Splitting and loading batches")
+            _run_fused_pipeline(config, splitter, loader, results)
+    finally:
+        loader.disconnect()
+
+    # Batch size analysis: average throughput per batch size
+    batch_size_agg = defaultdict(lambda: [0, 0.0])
+    for summary in results['load_summaries']:
+        stats = batch_size_agg[summary.batch_size_mb]
+        stats[0] += 1
+        stats[1] += summary.throughput_mb_per_second
+
+    print_header("Results")
+    print_summary_table(results['load_summaries'])
+
+    for size, (table_count, total_throughput) in sorted(batch_size_agg.items()):
+        results['by_batch_size'][size] = {
+            'table_count': table_count,
+            'total_throughput': total_throughput,
+        }
+        print(f"  {size}MB batches: {total_throughput / table_count:.2f} "
+              f"MB/s average throughput ({table_count} table(s))")
+
+    results['comparison'] = compare_loading_performance(
+        results['load_summaries'])
+    save_results(results, config['results_file'])
+
+    return results
+
+
+def example_usage():
+    """Split a single file and print its batch summary, without loading."""
+    splitter = FileSplitter("batch_files")
+    batch_files = splitter.split_file_by_lines("test_data/customers.csv", 25,
+                                               "customers")
+    summary = splitter.create_batch_summary("customers", batch_files)
+    print(json.dumps(summary, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Split CSV files and batch load them into Snowflake")
+    parser.add_argument('--config', help="Path to a JSON config file")
+    parser.add_argument('--split-only', action='store_true',
+                        help="Only split the source files")
+    parser.add_argument('--load-only', action='store_true',
+                        help="Only load previously split batch files")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    run_batch_loading_pipeline(config, split_only=args.split_only,
+                               load_only=args.load_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,592 @@
+"""
+Split large CSV files into smaller batch files for loading into Snowflake.
+
+Snowflake's COPY INTO performs best when files are staged in moderately
+sized chunks (the docs recommend 100-250 MB compressed), so this module
+takes the large CSVs produced by generate_sample_data.py and cuts them
+into batch files of a configurable target size, always on row boundaries
+so every batch is a valid CSV with its own header.
+"""
+
+import gzip
+import json
+import mmap
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+def _cut_and_count(buf: bytes, target: int) -> Tuple[int, int]:
+    """
+    Find the batch cut point and the number of rows it contains.
+
+    The cut is one past the last newline at or before target; the row
+    count covers the rows up to that cut. Both bytes.rfind and
+    bytes.count dispatch to CPython's C memchr/memrchr scans, which
+    glibc vectorizes, so this stays memory-bandwidth-bound without
+    needing a compiled extension.
+
+    Returns:
+        (cut_offset, row_count); (0, 0) when no newline is in range.
+    """
+    cut = buf.rfind(b'\n', 0, target) + 1
+    if cut == 0:
+        return 0, 0
+    return cut, buf.count(b'\n', 0, cut)
+
+
+def _split_one(source_file: str, batch_size_mb: int, table_name: str,
+               target_directory: str, backend: str, compress: bool,
+               queue_depth: Optional[int]) -> List[str]:
+    """
+    Split a single source file; module-level so it is picklable for
+    worker processes. Each worker rebuilds the parent's FileSplitter
+    configuration and writes to its own table subdirectory, so there is
+    no contention between them.
+    """
+    splitter = FileSplitter(target_directory, backend=backend,
+                            compress=compress, queue_depth=queue_depth)
+    return splitter.split_file_by_lines(source_file, batch_size_mb, table_name)
+
+
+class FileSplitter:
+    """
+    Splits large CSV files into batches of a target size.
+
+    Two backends are supported: 'stdio' (the default) writes each batch
+    synchronously as its boundaries are found, while 'overlapped' hands
+    batch writes to a background writer thread fed by a bounded queue so
+    the boundary scan and the writes proceed concurrently. The
+    overlapped backend requires os.sendfile (the explicit-offset copies
+    leave the scanner's file position untouched) and falls back to
+    'stdio' where that is unavailable.
+    """
+
+    def __init__(self, target_directory: str = "batch_files",
+                 backend: str = "stdio", compress: bool = False,
+                 queue_depth: Optional[int] = None):
+        if backend not in ('stdio', 'overlapped'):
+            raise ValueError(f"unknown backend: {backend!r}")
+        self.target_directory = Path(target_directory)
+        self.target_directory.mkdir(parents=True, exist_ok=True)
+        self.backend = backend
+        # Depth of the overlapped backend's write queue. None picks a
+        # default per split based on the batch size: deep queues help
+        # amortize submission overhead for small batches, while a few
+        # large batches in flight are enough to keep the disk busy (and
+        # each queued entry pins a batch range until written).
+        self.queue_depth = queue_depth
+        # With compress=True batches are written as .csv.gz so Snowflake
+        # PUT transfers 5-10x fewer bytes; COPY INTO decompresses server
+        # side. Batch sizing still targets the uncompressed byte count.
+        # The loader uploads .gz batches as-is and COPYs them under their
+        # own staged name (see SnowflakeBatchLoader._staged_name), so
+        # compressed and raw splits load interchangeably.
+        self.compress = compress
+        self._batch_suffix = '.csv.gz' if compress else '.csv'
+        # Exact byte and row counts recorded as batches are written, so
+        # summaries do not need to stat() or re-scan files we just
+        # produced.
+        self._last_split_sizes: Dict[str, int] = {}
+        self._last_split_rows: Dict[str, int] = {}
+
+    @staticmethod
+    def _copy_range(out_fd: int, source, offset: int, length: int):
+        """
+        Copy length bytes from the source file at offset into out_fd.
+
+        Uses os.sendfile where available so the bytes move kernel-side
+        without ever being materialized in Python; falls back to a
+        buffered read/write loop elsewhere.
+        """
+        if hasattr(os, 'sendfile'):
+            in_fd = source.fileno()
+            while length > 0:
+                sent = os.sendfile(out_fd, in_fd, offset, length)
+                if sent == 0:
+                    break
+                offset += sent
+                length -= sent
+        else:
+            position = source.tell()
+            source.seek(offset)
+            while length > 0:
+                chunk = source.read(min(length, 8 << 20))
+                if not chunk:
+                    break
+                os.write(out_fd, chunk)
+                length -= len(chunk)
+            source.seek(position)
+
+    @staticmethod
+    def _write_payload_direct(batch_path: str, header: bytes,
+                              payload) -> bool:
+        """
+        Write a batch (header + payload) with O_DIRECT, bypassing the
+        page cache.
+
+        The batch files are written once and immediately re-read by
+        Snowflake PUT, so caching them only doubles the data held in the
+        page cache. O_DIRECT needs page-aligned buffers and lengths, so
+        the payload is staged in an anonymous mmap (page-aligned by
+        construction), padded to a 4 KiB multiple for the write and
+        ftruncate'd back to the exact logical length afterwards.
+
+        Returns:
+            True on success, False when O_DIRECT is unsupported here
+            (non-Linux, tmpfs, NFS, ...); the caller then falls back to
+            a buffered write.
+        """
+        if not hasattr(os, 'O_DIRECT'):
+            return False
+
+        try:
+            out_fd = os.open(batch_path, os.O_WRONLY | os.O_CREAT |
+                             os.O_TRUNC | os.O_DIRECT, 0o644)
+        except OSError:
+            return False
+
+        alignment = mmap.PAGESIZE
+        total_length = len(header) + len(payload)
+        padded_size = -(-total_length // alignment) * alignment
+        buf = mmap.mmap(-1, padded_size)
+        try:
+            buf.write(header)
+            buf.write(payload)
+            os.write(out_fd, memoryview(buf))
+            os.ftruncate(out_fd, total_length)
+        except OSError:
+            os.close(out_fd)
+            return False
+        finally:
+            buf.close()
+
+        os.close(out_fd)
+        return True
+
+    def _link_passthrough(self, source_path: Path, src_size: int,
+                          table_dir: Path, table_name: str,
+                          on_batch=None) -> List[str]:
+        """
+        Emit a source that already fits in one batch as a hardlink.
+
+        Splitting such a file would read and rewrite every byte just to
+        produce an identical copy; a hardlink is an inode-level alias
+        with zero data I/O. Falls back to a plain copy when linking is
+        not possible (cross-filesystem targets, filesystems without
+        hardlinks).
+        """
+        batch_path = str(table_dir / f"{table_name}_batch_1.csv")
+        try:
+            if os.path.exists(batch_path):
+                os.unlink(batch_path)
+            os.link(source_path, batch_path)
+        except OSError:
+            shutil.copyfile(source_path, batch_path)
+
+        self._last_split_sizes[batch_path] = src_size
+        batch_files = [batch_path]
+        self._write_manifest(table_dir, batch_files)
+        if on_batch is not None:
+            on_batch(batch_path)
+
+        print(f"  {source_path.name} fits in one batch; linked as-is")
+        return batch_files
+
+    def _write_manifest(self, table_dir: Path, batch_files: List[str]):
+        """
+        Persist the batch list (in write order) next to the batches.
+
+        Later load-only runs read this instead of re-globbing the
+        directory, which also sidesteps the lexicographic-ordering trap
+        once batch numbers pass _9.
+        """
+        manifest = {
+            'batches': batch_files,
+            'sizes': [self._last_split_sizes.get(path) for path in batch_files],
+            'rows': [self._last_split_rows.get(path) for path in batch_files],
+        }
+        (table_dir / 'manifest.json').write_text(json.dumps(manifest))
+
+    def _write_line_batch(self, batch_path, header: bytes, payload):
+        """Write one batch (header + payload), preferring O_DIRECT."""
+        if self.compress:
+            with gzip.open(batch_path, 'wb', compresslevel=1) as gz:
+                gz.write(header)
+                gz.write(payload)
+        elif not self._write_payload_direct(str(batch_path), header, payload):
+            with open(batch_path, 'wb') as batch_file:
+                batch_file.write(header)
+                batch_file.write(payload)
+        if not self.compress:
+            self._last_split_sizes[str(batch_path)] = len(header) + len(payload)
+
+    @staticmethod
+    def _write_batch(batch_path: str, header: bytes, source, offset: int,
+                     length: int):
+        """Write one batch file: header plus a copied source range."""
+        out_fd = os.open(batch_path,
+                         os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(out_fd, header)
+            FileSplitter._copy_range(out_fd, source, offset, length)
+        finally:
+            os.close(out_fd)
+
+    def split_file_by_lines(self, source_path: str, batch_size_mb: int,
+                            table_name: str, on_batch=None) -> List[str]:
+        """
+        Split a CSV file into batches of roughly batch_size_mb each.
+
+        The source is scanned in binary mode in batch-sized buffers and
+        each batch is cut at the last newline that fits, so rows are never
+        torn across files and the file content is never decoded or
+        re-encoded. The batch payloads themselves are then transferred
+        kernel-side with os.sendfile, so batch data is never buffered in
+        Python. Each batch file gets a copy of the header row.
+
+        Args:
+            source_path: Path to the source CSV file.
+            batch_size_mb: Target size of each batch file in megabytes.
+            table_name: Name of the target table; used for the output
+                subdirectory and batch file names.
+            on_batch: Optional callable invoked with each batch path as
+                soon as that batch is fully written, so downstream work
+                (e.g. the Snowflake PUT) can start before the whole split
+                finishes.
+
+        Returns:
+            List of paths to the batch files that were written.
+        """
+        source_path = Path(source_path)
+        batch_size_bytes = batch_size_mb * 1024 * 1024
+
+        table_dir = self.target_directory / table_name
+        table_dir.mkdir(parents=True, exist_ok=True)
+
+        src_size = source_path.stat().st_size
+        if not self.compress and src_size <= batch_size_bytes:
+            return self._link_passthrough(source_path, src_size, table_dir,
+                                          table_name, on_batch)
+
+        batch_files = []
+        use_overlap = (self.backend == 'overlapped'
+                       and hasattr(os, 'sendfile') and not self.compress)
+
+        # One string prefix for every batch path: open() takes str
+        # directly, so the inner loop skips constructing (and fspath'ing)
+        # a fresh Path object per batch.
+        batch_prefix = f"{table_dir}{os.sep}{table_name}_batch_"
+
+        with open(source_path, 'rb', buffering=0) as source:
+            # The source is one strict sequential pass that is never
+            # re-read: ask the kernel for aggressive readahead, and drop
+            # each consumed range below so a multi-GB split does not
+            # evict the rest of the page cache.
+            can_fadvise = hasattr(os, 'posix_fadvise')
+            if can_fadvise:
+                os.posix_fadvise(source.fileno(), 0, 0,
+                                 os.POSIX_FADV_SEQUENTIAL)
+
+            header = source.readline()
+
+            work_queue = None
+            writer = None
+            write_errors = []
+
+            if use_overlap:
+                depth = self.queue_depth or \
+                    max(8, min(32, 256 // max(batch_size_mb, 1)))
+                work_queue = queue.Queue(maxsize=depth)
+
+                def _drain():
+                    while True:
+                        item = work_queue.get()
+                        if item is None:
+                            break
+                        try:
+                            self._write_batch(*item)
+                            if on_batch is not None:
+                                on_batch(item[0])
+                        except Exception as e:
+                            write_errors.append(e)
+
+                writer = threading.Thread(target=_drain, daemon=True)
+                writer.start()
+
+            # Scan for batch boundaries and emit each batch as soon as its
+            # (offset, length) range is known.
+            offset = len(header)
+            batch_number = 1
+
+            while True:
+                buf = source.read(batch_size_bytes)
+                if not buf:
+                    break
+
+                if len(buf) == batch_size_bytes:
+                    # Cut at the last complete row and push the partial
+                    # tail row back so the next batch picks it up.
+                    cut, row_count = _cut_and_count(buf, len(buf))
+                    if cut == 0:
+                        # Single row larger than the batch size: finish it.
+                        buf += source.readline()
+                        cut = len(buf)
+                        row_count = 1
+                    else:
+                        source.seek(cut - len(buf), 1)
+                else:
+                    cut = len(buf)
+                    row_count = buf.count(b'\n')
+                    if cut and not buf.endswith(b'\n'):
+                        row_count += 1  # final row without a newline
+
+                batch_path = f"{batch_prefix}{batch_number}{self._batch_suffix}"
+
+                if self.compress:
+                    # Level 1 is ~5x faster than the gzip default and
+                    # nearly as compact on CSV.
+                    with gzip.open(batch_path, 'wb', compresslevel=1) as gz:
+                        gz.write(header)
+                        gz.write(buf[:cut])
+                    if on_batch is not None:
+                        on_batch(batch_path)
+                elif use_overlap:
+                    work_queue.put((batch_path, header, source, offset, cut))
+                else:
+                    self._write_batch(batch_path, header, source, offset, cut)
+                    if on_batch is not None:
+                        on_batch(batch_path)
+
+                batch_files.append(batch_path)
+                if not self.compress:
+                    self._last_split_sizes[batch_path] = len(header) + cut
+                self._last_split_rows[batch_path] = row_count
+
+                # Synchronous backends are done with this source range;
+                # release its pages. (The overlapped writer may still be
+                # sendfile'ing from it, so skip the hint there.)
+                if can_fadvise and not use_overlap:
+                    os.posix_fadvise(source.fileno(), offset, cut,
+                                     os.POSIX_FADV_DONTNEED)
+
+                offset += cut
+                batch_number += 1
+
+            if use_overlap:
+                work_queue.put(None)
+                writer.join()
+                if write_errors:
+                    raise write_errors[0]
+
+        self._write_manifest(table_dir, batch_files)
+        print(f"  Split {source_path.name} into {len(batch_files)} batches "
+              f"of ~{batch_size_mb}MB each")
+        return batch_files
+
+    def split_file(self, source_path: str, batch_size_mb: int,
+                   table_name: str, max_rows_per_batch: int = None) -> List[str]:
+        """
+        Split a CSV file row by row, optionally capping rows per batch.
+
+        This is the streaming variant: it reads one row at a time, so it
+        can enforce an exact row limit per batch in addition to the size
+        target. For pure size-based splitting prefer split_file_by_lines,
+        which is considerably faster.
+
+        Args:
+            source_path: Path to the source CSV file.
+            batch_size_mb: Target size of each batch file in megabytes.
+            table_name: Name of the target table.
+            max_rows_per_batch: Optional hard cap on rows per batch file.
+
+        Returns:
+            List of paths to the batch files that were written.
+        """
+        source_path = Path(source_path)
+        batch_size_bytes = batch_size_mb * 1024 * 1024
+
+        table_dir = self.target_directory / table_name
+        table_dir.mkdir(parents=True, exist_ok=True)
+
+        if not self.compress and max_rows_per_batch is None:
+            src_size = source_path.stat().st_size
+            if src_size <= batch_size_bytes:
+                return self._link_passthrough(source_path, src_size,
+                                              table_dir, table_name)
+
+        batch_files = []
+        batch_number = 1
+        batch_prefix = f"{table_dir}{os.sep}{table_name}_batch_"
+
+        with open(source_path, 'rb') as source:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(source.fileno(), 0, 0,
+                                 os.POSIX_FADV_SEQUENTIAL)
+
+            header = source.readline()
+
+            mm = None
+            if max_rows_per_batch is None:
+                # Zero-copy fast path: map the source and write batch
+                # payloads as slices of the mapping, so batch bytes are
+                # never copied into a user-space read buffer at all.
+                try:
+                    mm = mmap.mmap(source.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    mm = None  # empty file or no mmap support
+
+            if mm is not None:
+                with mm:
+                    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    view = memoryview(mm)
+                    try:
+                        offset = len(header)
+                        end = len(mm)
+                        while offset < end:
+                            stop = min(offset + batch_size_bytes, end)
+                            if stop < end:
+                                cut = mm.rfind(b'\n', offset, stop) + 1
+                                if cut <= offset:
+                                    # Row longer than a batch: finish it.
+                                    cut = mm.find(b'\n', stop) + 1
+                                    if cut == 0:
+                                        cut = end
+                            else:
+                                cut = end
+
+                            batch_path = (f"{batch_prefix}{batch_number}"
+                                          f"{self._batch_suffix}")
+                            self._write_line_batch(batch_path, header,
+                                                   view[offset:cut])
+                            batch_files.append(batch_path)
+                            batch_number += 1
+                            offset = cut
+                    finally:
+                        view.release()
+
+                self._write_manifest(table_dir, batch_files)
+                print(f"  Split {source_path.name} into {len(batch_files)} "
+                      f"batches of ~{batch_size_mb}MB each")
+                return batch_files
+
+            # One preallocated buffer, reused across batches: rows are
+            # copied in place and each batch goes out as a single
+            # contiguous write instead of millions of list slots fed to
+            # writelines. The slack past the target size absorbs the row
+            # that crosses the batch boundary.
+            buf = bytearray(batch_size_bytes + (64 << 10))
+            pos = 0
+            current_batch_rows = 0
+
+            def _flush_batch():
+                nonlocal pos, current_batch_rows, batch_number
+                batch_path = f"{batch_prefix}{batch_number}{self._batch_suffix}"
+                self._write_line_batch(batch_path, header,
+                                       memoryview(buf)[:pos])
+                batch_files.append(batch_path)
+                batch_number += 1
+                pos = 0
+                current_batch_rows = 0
+
+            # Iterating a binary file yields bytes lines without the
+            # decode at read time and re-encode for size accounting that
+            # text mode would force on every row.
+            for line in source:
+                n = len(line)
+                if pos and pos + n > len(buf):
+                    # Row would overflow the slack: close the batch early.
+                    _flush_batch()
+
+                buf[pos:pos + n] = line
+                pos += n
+                current_batch_rows += 1
+
+                batch_full = pos >= batch_size_bytes
+                if max_rows_per_batch is not None:
+                    batch_full = batch_full or current_batch_rows >= max_rows_per_batch
+
+                if batch_full:
+                    _flush_batch()
+
+            if pos:
+                _flush_batch()
+
+        self._write_manifest(table_dir, batch_files)
+        print(f"  Split {source_path.name} into {len(batch_files)} batches "
+              f"of ~{batch_size_mb}MB each")
+        return batch_files
+
+    def split_multiple_files(self, file_configs: List[Tuple[str, int, str]]) -> Dict[str, List[str]]:
+        """
+        Split several source files in parallel, one worker per file.
+
+        Every file-split is independent (own source, own output
+        subdirectory), so a process pool gives near-linear speedup until
+        disk bandwidth saturates.
+
+        Args:
+            file_configs: List of (source_file, batch_size_mb, table_name)
+                tuples.
+
+        Returns:
+            Mapping of table name to the list of batch files written for it.
+        """
+        results = {}
+        max_workers = min(len(file_configs), os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_split_one, source_file, batch_size_mb,
+                                table_name, str(self.target_directory),
+                                self.backend, self.compress,
+                                self.queue_depth):
+                table_name
+                for source_file, batch_size_mb, table_name in file_configs
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        return results
+
+    def create_batch_summary(self, table_name: str,
+                             batch_files: List[str]) -> Dict:
+        """
+        Build a summary of the batch files written for a table.
+
+        Args:
+            table_name: Name of the target table.
+            batch_files: Batch file paths as returned by the split methods.
+
+        Returns:
+            Dict with batch count, per-file sizes and total size in MB.
+        """
+        batch_details = []
+        total_size_mb = 0.0
+
+        for file_path in batch_files:
+            # Sizes were recorded as the batches were written; only stat
+            # files this splitter did not produce itself (or compressed
+            # batches, whose on-disk size differs from the logical size).
+            size_bytes = self._last_split_sizes.get(file_path)
+            if size_bytes is None:
+                size_bytes = Path(file_path).stat().st_size
+            size_mb = size_bytes / (1024 * 1024)
+            batch_details.append({
+                'file': file_path,
+                'size_mb': round(size_mb, 2),
+            })
+            total_size_mb += size_mb
+
+        return {
+            'table_name': table_name,
+            'batch_count': len(batch_files),
+            'batch_details': batch_details,
+            'total_size_mb': round(total_size_mb, 2),
+        }
@@ -0,0 +1,383 @@
+"""
+Generate sample CSV files for the batch loading exercises.
+
+Produces a small set of large CSV files with a mix of column types
+(integers, floats, dates, categories and free text) so that the file
+splitter and the Snowflake batch loader have realistic data to work
+with. File sizes are targeted in megabytes, not row counts, to mirror
+how staged file sizes are reasoned about in Snowflake.
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Rows generated per batch in the vectorized path. Large enough to
+# amortize the per-batch NumPy dispatch, small enough to keep a batch's
+# column arrays comfortably in cache-friendly memory (~tens of MB).
+_BATCH_ROWS = 100_000
+
+# Choice tables for the categorical and text columns, built once instead
+# of per row. Both have exactly 4 entries so an index can be drawn with
+# two random bits.
+_CATS = ('Category_A', 'Category_B', 'Category_C', 'Category_D')
+_TEXTS = (
+    'Sample text for data loading tests',
+    'Another example of a text value',
+    'Snowflake batch loading exercise data',
+    'Generated row for performance comparison',
+)
+
+# The date column only ever holds one of the 1461 days in 2020-2023;
+# strftime is one of CPython's slowest formatting paths, so render them
+# all once and index the table instead.
+_DATES = tuple(
+    (datetime(2020, 1, 1) + timedelta(days=d)).strftime('%Y-%m-%d')
+    for d in range(1461))
+
+if np is not None:
+    _CATS_ARR = np.array(_CATS)
+    _TEXTS_ARR = np.array(_TEXTS)
+    _DATES_ARR = np.array(_DATES)
+    # PCG64 generator: draws arrays several times faster than the legacy
+    # MT19937-backed np.random.* functions. Re-seeded per pool worker by
+    # _seed_worker.
+    _RNG = np.random.default_rng()
+
+
+def _preallocate(fd: int, nbytes: int):
+    """
+    Reserve space for the output file up front where supported.
+
+    One contiguous extent reservation replaces the incremental extent
+    allocations of a multi-hundred-MB append; callers ftruncate back to
+    the bytes actually written.
+    """
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, nbytes)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=8)
+def _header_bytes(num_columns: int) -> bytes:
+    """Build the header line once per column count."""
+    return (','.join(
+        f"column_{i}" for i in range(1, num_columns + 1)) + '\n').encode()
+
+
+def _row_format(num_columns: int) -> str:
+    """Build the printf-style format string for one CSV row."""
+    parts = ['%d']
+    for i in range(num_columns - 1):
+        col_type = i % 5
+        if col_type == 0:
+            parts.append('%d')
+        elif col_type == 1:
+            parts.append('%.2f')
+        else:
+            parts.append('%s')
+    return ','.join(parts) + '\n'
+
+
+@lru_cache(maxsize=4)
+def _batch_format(num_columns: int, n: int) -> str:
+    """Row format repeated n times, so a whole batch formats in one call."""
+    return _row_format(num_columns) * n
+
+
+def _generate_batch(start_id: int, n: int, num_columns: int) -> List:
+    """
+    Generate n rows as a list of column arrays (structure of arrays).
+
+    Drawing whole columns with NumPy replaces roughly five Python-level
+    random calls per cell with one C-level call per column, which is
+    where the per-row generator spends nearly all of its time.
+    """
+    columns = [np.arange(start_id, start_id + n, dtype=np.int64)]
+
+    for i in range(num_columns - 1):
+        col_type = i % 5
+
+        if col_type == 0:
+            columns.append(_RNG.integers(1, 1_000_001, n, dtype=np.int32))
+        elif col_type == 1:
+            columns.append((_RNG.random(n) * 10000).round(2))
+        elif col_type == 2:
+            columns.append(_DATES_ARR[_RNG.integers(0, len(_DATES), n)])
+        elif col_type == 3:
+            columns.append(_CATS_ARR[_RNG.integers(0, len(_CATS), n)])
+        else:
+            columns.append(_TEXTS_ARR[_RNG.integers(0, len(_TEXTS), n)])
+
+    return columns
+
+
+def generate_sample_row(row_id: int, num_columns: int) -> List:
+    """
+    Generate a single sample row.
+
+    The first column is the row id; the remaining columns cycle through
+    five types: integer, float, date, category and text.
+    """
+    row = [row_id]
+
+    for i in range(num_columns - 1):
+        col_type = i % 5
+
+        if col_type == 0:
+            row.append(random.randint(1, 1_000_000))
+        elif col_type == 1:
+            row.append(round(random.uniform(0, 10000), 2))
+        elif col_type == 2:
+            row.append(_DATES[random.randint(0, 1460)])
+        elif col_type == 3:
+            row.append(_CATS[random.getrandbits(2)])
+        else:
+            row.append(_TEXTS[random.getrandbits(2)])
+
+    return row
+
+
+def _generate_csv_file_vectorized(output_file: str, target_size_bytes: int,
+                                  num_columns: int) -> int:
+    """
+    Vectorized variant of generate_csv_file, used when NumPy is present.
+
+    Rows are generated in column batches by _generate_batch and formatted
+    with a single precompiled format string, so each row costs one
+    format call instead of a dozen random/str round trips. Once the
+    first batch establishes the average row size, the final batch is
+    sized to land close to the target instead of overshooting by a full
+    batch.
+    """
+    header_line = _header_bytes(num_columns)
+
+    with open(output_file, 'wb', buffering=1 << 20) as f:
+        _preallocate(f.fileno(), target_size_bytes)
+        f.write(header_line)
+        current_size = len(header_line)
+
+        row_id = 0
+        avg_row_bytes = None
+        while current_size < target_size_bytes:
+            if avg_row_bytes is None:
+                # Small probe batch to learn the average row size before
+                # committing to full-size batches.
+                n = 1000
+            else:
+                remaining = target_size_bytes - current_size
+                n = min(_BATCH_ROWS,
+                        max(1, int(remaining // avg_row_bytes) + 1))
+
+            # tolist() converts each column to native Python objects in
+            # one C call, and the batch-sized format string renders every
+            # row in a single %-interpolation, keeping the whole
+            # format-and-join loop inside the interpreter's C code.
+            columns = [
+                col.tolist()
+                for col in _generate_batch(row_id + 1, n, num_columns)]
+            chunk = (_batch_format(num_columns, n) % tuple(
+                chain.from_iterable(zip(*columns)))).encode('utf-8')
+            f.write(chunk)
+
+            current_size += len(chunk)
+            row_id += n
+            avg_row_bytes = max(len(chunk) // n, 1)
+
+        f.flush()
+        os.ftruncate(f.fileno(), current_size)
+
+    print(f"  Generated {output_file}: {row_id:,} rows, "
+          f"~{current_size / (1024 * 1024):.1f}MB")
+    return row_id
+
+
+def _generate_csv_file_pandas(output_file: str, target_size_bytes: int,
+                              num_columns: int) -> int:
+    """
+    pandas variant of generate_csv_file, used with use_pandas=True.
+
+    Hands each column batch to DataFrame.to_csv, whose C writer formats
+    rows without the per-row Python format call of the vectorized path.
+    Size is tracked with f.tell() since pandas owns the byte layout.
+    """
+    headers = [f"column_{i}" for i in range(1, num_columns + 1)]
+
+    with open(output_file, 'wb', buffering=1 << 20) as f:
+        _preallocate(f.fileno(), target_size_bytes)
+        f.write(_header_bytes(num_columns))
+        current_size = f.tell()
+
+        row_id = 0
+        avg_row_bytes = None
+        while current_size < target_size_bytes:
+            if avg_row_bytes is None:
+                n = 1000
+            else:
+                remaining = target_size_bytes - current_size
+                n = min(2 * _BATCH_ROWS,
+                        max(1, int(remaining // avg_row_bytes) + 1))
+
+            columns = _generate_batch(row_id + 1, n, num_columns)
+            frame = pd.DataFrame(dict(zip(headers, columns)), copy=False)
+            frame.to_csv(f, header=False, index=False, lineterminator='\n')
+
+            written = f.tell()
+            avg_row_bytes = max((written - current_size) // n, 1)
+            current_size = written
+            row_id += n
+
+        f.flush()
+        os.ftruncate(f.fileno(), current_size)
+
+    print(f"  Generated {output_file}: {row_id:,} rows, "
+          f"~{current_size / (1024 * 1024):.1f}MB")
+    return row_id
+
+
+def generate_csv_file(output_file: str, target_size_mb: int,
+                      num_columns: int = 10,
+                      use_pandas: bool = False) -> int:
+    """
+    Generate a CSV file of roughly target_size_mb megabytes.
+
+    Args:
+        output_file: Path of the CSV file to write.
+        target_size_mb: Approximate size of the generated file in MB.
+        num_columns: Number of columns per row (including the row id).
+        use_pandas: Format rows with pandas' C CSV writer instead of
+            the built-in format loop (requires pandas).
+
+    Returns:
+        The number of data rows written.
+    """
+    target_size_bytes = target_size_mb * 1024 * 1024
+
+    if use_pandas and pd is not None:
+        return _generate_csv_file_pandas(output_file, target_size_bytes,
+                                         num_columns)
+
+    if np is not None:
+        return _generate_csv_file_vectorized(output_file, target_size_bytes,
+                                             num_columns)
+
+    with open(output_file, 'wb', buffering=0) as f:
+        _preallocate(f.fileno(), target_size_bytes)
+
+        # Accumulate rows in a user-space buffer and push it to the fd
+        # in 8 MiB writes: one syscall per ~80k rows instead of relying
+        # on the default 8 KiB stream buffer flushing every ~80 rows.
+        buf = bytearray(_header_bytes(num_columns))
+        current_size = len(buf)
+
+        # Instead of tallying bytes per row, run row-count-sized chunks
+        # and re-check the real size (written bytes plus the pending
+        # buffer) once per chunk, estimating the chunk length from the
+        # observed average row size.
+        row_id = 0
+        avg_row_bytes = None
+        while current_size < target_size_bytes:
+            if avg_row_bytes is None:
+                chunk_rows = 1000
+            else:
+                remaining = target_size_bytes - current_size
+                chunk_rows = min(
+                    10_000, max(1, remaining // avg_row_bytes + 1))
+
+            for _ in range(chunk_rows):
+                row_id += 1
+                row = generate_sample_row(row_id, num_columns)
+                buf += (','.join(map(str, row)) + '\n').encode('utf-8')
+
+                if len(buf) >= 8 << 20:
+                    os.write(f.fileno(), buf)
+                    buf.clear()
+
+            # The write offset, not fstat: with preallocation the file
+            # size already reads as the full target.
+            current_size = os.lseek(f.fileno(), 0, os.SEEK_CUR) + len(buf)
+            avg_row_bytes = max(current_size // row_id, 1)
+
+        if buf:
+            os.write(f.fileno(), buf)
+        os.ftruncate(f.fileno(), os.lseek(f.fileno(), 0, os.SEEK_CUR))
+
+    print(f"  Generated {output_file}: {row_id:,} rows, "
+          f"~{current_size / (1024 * 1024):.1f}MB")
+    return row_id
+
+
+def _seed_worker():
+    """
+    Re-seed the RNGs in a pool worker.
+
+    Forked workers inherit the parent's RNG state; without this, every
+    worker would emit the identical stream of "random" rows.
+    """
+    global _RNG
+    seed = os.getpid() ^ time.time_ns()
+    random.seed(seed)
+    if np is not None:
+        _RNG = np.random.default_rng(seed)
+
+
+def generate_test_dataset(output_directory: str = "test_data") -> int:
+    """
+    Generate the default test dataset used by the batch loading pipeline.
+
+    The files are independent, so they are generated concurrently by a
+    process pool — one worker per file, capped at the core count.
+
+    Args:
+        output_directory: Directory in which the CSV files are created.
+
+    Returns:
+        Total number of data rows generated across all files.
+    """
+    output_path = Path(output_directory)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    file_configs: List[Tuple[str, int]] = [
+        ('customers.csv', 250),
+        ('orders.csv', 500),
+        ('products.csv', 250),
+        ('transactions.csv', 500),
+        ('events.csv', 300),
+    ]
+
+    print(f"Generating test dataset in {output_directory}/ ...")
+
+    workers = min(len(file_configs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_seed_worker) as executor:
+        futures = [
+            executor.submit(generate_csv_file, str(output_path / file_name),
+                            size_mb)
+            for file_name, size_mb in file_configs
+        ]
+        total_rows = sum(future.result() for future in as_completed(futures))
+
+    print(f"Done: {total_rows:,} total rows across {len(file_configs)} files")
+    return total_rows
+
+
+if __name__ == "__main__":
+    generate_test_dataset()
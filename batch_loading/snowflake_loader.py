@@ -0,0 +1,600 @@
+"""
+Load batch CSV files into Snowflake through an internal stage.
+
+For every table the loader creates a named stage, PUTs each batch file
+into it and runs COPY INTO, recording per-batch timings so that the
+orchestrator can compare loading throughput across batch sizes.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import snowflake.connector
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@dataclass(slots=True)
+class LoadResult:
+    """Outcome of loading a single batch file."""
+    batch_number: int
+    file_path: str
+    file_size_mb: float
+    rows_loaded: int
+    duration_seconds: float
+    start_time: datetime
+    end_time: datetime
+    success: bool
+    error_message: Optional[str] = None
+
+
+@dataclass(slots=True)
+class TableLoadSummary:
+    """Aggregated result of loading all batches for one table."""
+    table_name: str
+    batch_size_mb: int
+    total_batches: int
+    successful_batches: int
+    failed_batches: int
+    total_rows_loaded: int
+    total_size_mb: float
+    total_duration_seconds: float
+    throughput_mb_per_second: float
+    load_results: List[LoadResult] = field(default_factory=list)
+
+
+@dataclass(frozen=True, slots=True)
+class BatchRef:
+    """
+    Precomputed identity of a batch file: path, base name and size.
+
+    Built once per batch so the hot loading paths do not reconstruct
+    Path objects and re-stat the same file several times per batch.
+    """
+    path: str
+    name: str
+    size_mb: float
+
+    @classmethod
+    def from_path(cls, path: str) -> "BatchRef":
+        return cls(path, os.path.basename(path),
+                   os.path.getsize(path) / (1024 * 1024))
+
+
+class SnowflakeBatchLoader:
+    """Loads batch files into Snowflake tables via internal stages."""
+
+    def __init__(self, connection_params: Dict[str, str]):
+        self.connection_params = connection_params
+        self.connection = None
+        self.cursor = None
+
+    def connect(self):
+        """
+        Open the Snowflake connection and prepare the session.
+
+        One cursor is created here and reused by every synchronous
+        statement, instead of paying cursor setup per call. The session
+        disables the result cache so repeated runs measure the
+        warehouse, not cached results, and the warehouse is resumed up
+        front so the first batch does not absorb the cold-start delay.
+        """
+        self.connection = snowflake.connector.connect(**self.connection_params)
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+
+        warehouse = self.connection_params.get('warehouse')
+        if warehouse:
+            self.cursor.execute(
+                f"ALTER WAREHOUSE {warehouse} RESUME IF SUSPENDED")
+
+    def disconnect(self):
+        """Close the Snowflake connection."""
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def create_stage(self, table_name: str) -> str:
+        """Create (if needed) and return the internal stage for a table."""
+        stage_name = f"{table_name}_stage"
+        self.cursor.execute(f"CREATE STAGE IF NOT EXISTS {stage_name}")
+        return stage_name
+
+    def create_table(self, table_name: str, num_columns: int = 10):
+        """
+        Create the target table matching the generated CSV layout.
+
+        Columns follow the generator's cycle of types: the first column is
+        the integer row id, the rest repeat NUMBER, FLOAT, DATE and two
+        VARCHAR flavors.
+        """
+        column_types = ['NUMBER', 'FLOAT', 'DATE', 'VARCHAR(50)', 'VARCHAR(200)']
+        columns = ['column_1 NUMBER']
+        for i in range(num_columns - 1):
+            columns.append(f"column_{i + 2} {column_types[i % 5]}")
+
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(columns)})")
+
+    def put_file(self, local_file: str, stage_name: str,
+                 file_size_mb: Optional[float] = None) -> float:
+        """
+        Upload a local file into a stage.
+
+        Plain .csv files are gzipped locally at level 1 first, so the
+        PUT ships 5-8x fewer bytes over the network (the generated data
+        is highly repetitive) and skips the connector's own compression
+        pass. The staged name is the same .csv.gz that AUTO_COMPRESS
+        would have produced, so COPY statements are unaffected.
+
+        Returns:
+            Size of the source file in MB.
+        """
+        if file_size_mb is None:
+            file_size_mb = Path(local_file).stat().st_size / (1024 * 1024)
+
+        upload_file = local_file
+        pre_compressed = not local_file.endswith('.csv')
+        if not pre_compressed:
+            upload_file = local_file + '.gz'
+            with open(local_file, 'rb') as src, \
+                    gzip.open(upload_file, 'wb', compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+
+        auto_compress = 'TRUE' if pre_compressed else 'FALSE'
+        try:
+            self.cursor.execute(
+                f"PUT 'file://{upload_file}' @{stage_name} "
+                f"AUTO_COMPRESS={auto_compress} OVERWRITE=TRUE")
+        finally:
+            if upload_file != local_file:
+                os.unlink(upload_file)
+
+        return file_size_mb
+
+    def put_files_glob(self, stage_dir: str, table_name: str,
+                       stage_name: str, file_count: int,
+                       suffix: str = '.csv'):
+        """
+        Upload all batch files for a table with one glob PUT.
+
+        A single PUT with a wildcard lets the connector upload the files
+        concurrently (PARALLEL) instead of paying the per-statement
+        round-trip once per batch file.
+        """
+        parallel = min(max(file_count, 1), 8)
+        self.cursor.execute(
+            f"PUT 'file://{stage_dir}/{table_name}_batch_*{suffix}' "
+            f"@{stage_name} PARALLEL={parallel} "
+            f"AUTO_COMPRESS=TRUE OVERWRITE=TRUE")
+
+    @staticmethod
+    def _staged_name(file_name: str) -> str:
+        """
+        Name a batch file carries once staged.
+
+        Raw .csv uploads gain a .gz suffix (put_file compresses them, as
+        AUTO_COMPRESS would); pre-compressed .csv.gz batches from
+        FileSplitter(compress=True) keep their name as-is.
+        """
+        return file_name if file_name.endswith('.gz') else file_name + '.gz'
+
+    def copy_into_table(self, table_name: str, stage_name: str,
+                        file_name: str) -> int:
+        """
+        COPY a staged file into the target table.
+
+        Returns:
+            Number of rows loaded.
+        """
+        staged = self._staged_name(file_name)
+        self.cursor.execute(
+            f"COPY INTO {table_name} FROM @{stage_name}/{staged} "
+            f"FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 "
+            f"FIELD_OPTIONALLY_ENCLOSED_BY = '\"') "
+            f"PURGE = TRUE ON_ERROR = ABORT_STATEMENT")
+        rows_loaded = 0
+        for result_row in self.cursor.fetchall():
+            rows_loaded += result_row[3]
+
+        return rows_loaded
+
+    def _submit_copy_async(self, table_name: str, stage_name: str,
+                           file_name: str) -> str:
+        """Submit the COPY for a staged file without waiting; return its query id."""
+        staged = self._staged_name(file_name)
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute_async(
+                f"COPY INTO {table_name} FROM @{stage_name}/{staged} "
+                f"FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 "
+                f"FIELD_OPTIONALLY_ENCLOSED_BY = '\"') "
+                f"PURGE = TRUE ON_ERROR = ABORT_STATEMENT")
+            return cursor.sfqid
+        finally:
+            cursor.close()
+
+    def _collect_copy_result(self, query_id: str) -> int:
+        """Wait for an async COPY to finish and return its loaded row count."""
+        while self.connection.is_still_running(
+                self.connection.get_query_status_throw_if_error(query_id)):
+            time.sleep(0.1)
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.get_results_from_sfqid(query_id)
+            return sum(row[3] for row in cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def copy_into_table_pattern(self, table_name: str, stage_name: str,
+                                pattern: str) -> List[tuple]:
+        """
+        COPY every staged file matching a pattern in one statement.
+
+        Returns:
+            The COPY INTO result rows, one per loaded file.
+        """
+        self.cursor.execute(
+            f"COPY INTO {table_name} FROM @{stage_name} "
+            f"PATTERN = '{pattern}' "
+            f"FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 "
+            f"FIELD_OPTIONALLY_ENCLOSED_BY = '\"') "
+            f"PURGE = TRUE ON_ERROR = CONTINUE")
+        return self.cursor.fetchall()
+
+    def load_batch_file(self, table_name: str, stage_name: str,
+                        batch_file, batch_number: int,
+                        already_staged: bool = False) -> LoadResult:
+        """
+        Load one batch file into the table, with timing.
+
+        PUTs the file first unless already_staged says it was uploaded
+        up front (e.g. by a glob PUT covering the whole table).
+        batch_file may be a path or an already-built BatchRef.
+        """
+        if not isinstance(batch_file, BatchRef):
+            batch_file = BatchRef.from_path(batch_file)
+        ref = batch_file
+
+        # One wall-clock read for reporting; the duration itself comes
+        # from the monotonic counter, which is both cheaper and immune
+        # to clock adjustments mid-load.
+        start_time = datetime.now()
+        t0 = time.perf_counter_ns()
+
+        try:
+            if not already_staged:
+                self.put_file(ref.path, stage_name, ref.size_mb)
+            rows_loaded = self.copy_into_table(table_name, stage_name,
+                                               ref.name)
+            duration = (time.perf_counter_ns() - t0) / 1e9
+
+            return LoadResult(
+                batch_number=batch_number,
+                file_path=ref.path,
+                file_size_mb=round(ref.size_mb, 2),
+                rows_loaded=rows_loaded,
+                duration_seconds=duration,
+                start_time=start_time,
+                end_time=start_time + timedelta(seconds=duration),
+                success=True,
+            )
+        except Exception as e:
+            duration = (time.perf_counter_ns() - t0) / 1e9
+            return LoadResult(
+                batch_number=batch_number,
+                file_path=ref.path,
+                file_size_mb=round(ref.size_mb, 2),
+                rows_loaded=0,
+                duration_seconds=duration,
+                start_time=start_time,
+                end_time=start_time + timedelta(seconds=duration),
+                success=False,
+                error_message=str(e),
+            )
+
+    def _load_batches_pipelined(self, table_name: str, stage_name: str,
+                                refs: List[BatchRef]) -> List[LoadResult]:
+        """
+        Load batches with PUT and COPY overlapped.
+
+        A dedicated uploader thread PUTs the files in order while the
+        main thread submits each file's COPY with execute_async as soon
+        as its upload finishes, so batch N+1 is uploading while the
+        warehouse is still copying batch N. Results are collected after
+        all COPYs are in flight. Since the phases overlap, per-batch
+        durations overlap too; the wall-clock win shows up in the
+        summary totals.
+        """
+        load_results = []
+        in_flight = []
+
+        with ThreadPoolExecutor(max_workers=1) as uploader:
+            put_futures = {
+                i: uploader.submit(self.put_file, ref.path, stage_name,
+                                   ref.size_mb)
+                for i, ref in enumerate(refs, start=1)
+            }
+
+            for i, ref in enumerate(refs, start=1):
+                start_time = datetime.now()
+                t0 = time.perf_counter_ns()
+                try:
+                    put_futures[i].result()
+                    query_id = self._submit_copy_async(
+                        table_name, stage_name, ref.name)
+                    in_flight.append((i, ref, start_time, t0, query_id))
+                except Exception as e:
+                    duration = (time.perf_counter_ns() - t0) / 1e9
+                    load_results.append(LoadResult(
+                        batch_number=i,
+                        file_path=ref.path,
+                        file_size_mb=round(ref.size_mb, 2),
+                        rows_loaded=0,
+                        duration_seconds=duration,
+                        start_time=start_time,
+                        end_time=start_time + timedelta(seconds=duration),
+                        success=False,
+                        error_message=str(e),
+                    ))
+
+        for i, ref, start_time, t0, query_id in in_flight:
+            try:
+                rows_loaded = self._collect_copy_result(query_id)
+                duration = (time.perf_counter_ns() - t0) / 1e9
+                load_results.append(LoadResult(
+                    batch_number=i,
+                    file_path=ref.path,
+                    file_size_mb=round(ref.size_mb, 2),
+                    rows_loaded=rows_loaded,
+                    duration_seconds=duration,
+                    start_time=start_time,
+                    end_time=start_time + timedelta(seconds=duration),
+                    success=True,
+                ))
+            except Exception as e:
+                duration = (time.perf_counter_ns() - t0) / 1e9
+                load_results.append(LoadResult(
+                    batch_number=i,
+                    file_path=ref.path,
+                    file_size_mb=round(ref.size_mb, 2),
+                    rows_loaded=0,
+                    duration_seconds=duration,
+                    start_time=start_time,
+                    end_time=start_time + timedelta(seconds=duration),
+                    success=False,
+                    error_message=str(e),
+                ))
+
+        load_results.sort(key=lambda r: r.batch_number)
+        return load_results
+
+    def load_table_batches(self, table_name: str, batch_files: List[str],
+                           batch_size_mb: int,
+                           stage_dir: Optional[str] = None) -> TableLoadSummary:
+        """
+        Load all batch files for one table and summarize the run.
+
+        Args:
+            table_name: Target table name.
+            batch_files: Paths of the batch files to load, in order.
+            batch_size_mb: Batch size the files were split with (for
+                reporting only).
+            stage_dir: Directory holding the batch files. When given, all
+                files are uploaded up front with a single parallel glob
+                PUT instead of one PUT per batch.
+
+        Returns:
+            TableLoadSummary with per-batch results and totals.
+        """
+        print(f"Loading {len(batch_files)} batches into {table_name}...")
+
+        stage_name = self.create_stage(table_name)
+        self.create_table(table_name)
+
+        refs = [BatchRef.from_path(p) for p in batch_files]
+
+        staged_up_front = stage_dir is not None and bool(refs)
+        if staged_up_front:
+            suffix = '.csv.gz' if refs[0].name.endswith('.gz') else '.csv'
+            self.put_files_glob(stage_dir, table_name, stage_name,
+                                len(refs), suffix)
+
+        if staged_up_front:
+            load_results = []
+            for i, ref in enumerate(refs, start=1):
+                load_results.append(self.load_batch_file(
+                    table_name, stage_name, ref, i, already_staged=True))
+        else:
+            load_results = self._load_batches_pipelined(
+                table_name, stage_name, refs)
+
+        for result in load_results:
+            status = ("OK" if result.success
+                      else f"FAILED: {result.error_message}")
+            print(f"  Batch {result.batch_number}/{len(batch_files)}: "
+                  f"{result.duration_seconds:.2f}s {status}")
+
+        return summarize_load_results(table_name, batch_size_mb, load_results)
+
+    def load_table_batches_bulk(self, table_name: str, batch_files: List[str],
+                                batch_size_mb: int,
+                                stage_dir: str) -> TableLoadSummary:
+        """
+        Load all batch files for one table with two statements.
+
+        One glob PUT uploads every batch file concurrently and one COPY
+        INTO with a PATTERN loads them all, so the per-statement
+        round-trip is paid twice per table instead of twice per batch.
+        Per-file row counts come from the COPY result set (one result
+        row per file); since the warehouse reports no per-file timings,
+        the total duration is split evenly across the batches.
+
+        Args:
+            table_name: Target table name.
+            batch_files: Paths of the batch files to load, in order.
+            batch_size_mb: Batch size the files were split with (for
+                reporting only).
+            stage_dir: Directory holding the batch files.
+
+        Returns:
+            TableLoadSummary with per-batch results and totals.
+        """
+        print(f"Bulk loading {len(batch_files)} batches into {table_name}...")
+
+        if not batch_files:
+            return summarize_load_results(table_name, batch_size_mb, [])
+
+        stage_name = self.create_stage(table_name)
+        self.create_table(table_name)
+
+        refs = [BatchRef.from_path(p) for p in batch_files]
+
+        start_time = datetime.now()
+        t0 = time.perf_counter_ns()
+        suffix = '.csv.gz' if refs[0].name.endswith('.gz') else '.csv'
+        self.put_files_glob(stage_dir, table_name, stage_name,
+                            len(refs), suffix)
+        copy_rows = self.copy_into_table_pattern(
+            table_name, stage_name,
+            f".*{table_name}_batch_.*\\.csv(\\.gz)?")
+        duration = (time.perf_counter_ns() - t0) / 1e9
+        end_time = start_time + timedelta(seconds=duration)
+
+        # One COPY result row per staged file: row[0] is the file name,
+        # row[1] the load status and row[3] the number of rows loaded.
+        stats_by_name = {
+            Path(row[0]).name.removesuffix('.gz'): (row[1], row[3])
+            for row in copy_rows
+        }
+
+        per_batch_duration = duration / max(len(refs), 1)
+
+        load_results = []
+        for i, ref in enumerate(refs, start=1):
+            name = ref.name.removesuffix('.gz')
+            status, rows_loaded = stats_by_name.get(name, ('MISSING', 0))
+            success = status in ('LOADED', 'PARTIALLY_LOADED')
+            load_results.append(LoadResult(
+                batch_number=i,
+                file_path=ref.path,
+                file_size_mb=round(ref.size_mb, 2),
+                rows_loaded=rows_loaded,
+                duration_seconds=per_batch_duration,
+                start_time=start_time,
+                end_time=end_time,
+                success=success,
+                error_message=None if success else f"COPY status: {status}",
+            ))
+
+        return summarize_load_results(table_name, batch_size_mb, load_results)
+
+
+def summarize_load_results(table_name: str, batch_size_mb: int,
+                           load_results: List[LoadResult]) -> TableLoadSummary:
+    """Aggregate per-batch LoadResults into a TableLoadSummary."""
+    total_duration = 0.0
+    total_rows = 0
+    total_size = 0.0
+    successful = 0
+    for r in load_results:
+        total_duration += r.duration_seconds
+        total_rows += r.rows_loaded
+        total_size += r.file_size_mb
+        successful += r.success
+
+    return TableLoadSummary(
+        table_name=table_name,
+        batch_size_mb=batch_size_mb,
+        total_batches=len(load_results),
+        successful_batches=successful,
+        failed_batches=len(load_results) - successful,
+        total_rows_loaded=total_rows,
+        total_size_mb=round(total_size, 2),
+        total_duration_seconds=round(total_duration, 2),
+        throughput_mb_per_second=round(
+            total_size / total_duration, 2) if total_duration > 0 else 0.0,
+        load_results=load_results,
+    )
+
+
+def compare_loading_performance(summaries: List[TableLoadSummary]) -> Dict:
+    """
+    Compare load performance across tables / batch sizes.
+
+    Args:
+        summaries: TableLoadSummary objects from load_table_batches.
+
+    Returns:
+        Dict with per-table stats plus the fastest table and the table
+        with the highest throughput.
+    """
+    comparison = {'tables': []}
+    fastest = None
+    highest = None
+
+    # Per-table stats, fastest and highest throughput in one pass
+    # instead of a loop plus separate min() and max() scans. The table
+    # dicts stay hand-built: dataclasses.asdict would deep-copy every
+    # embedded LoadResult just to throw them away.
+    for summary in summaries:
+        comparison['tables'].append({
+            'table_name': summary.table_name,
+            'batch_size_mb': summary.batch_size_mb,
+            'total_batches': summary.total_batches,
+            'successful_batches': summary.successful_batches,
+            'failed_batches': summary.failed_batches,
+            'total_rows_loaded': summary.total_rows_loaded,
+            'total_size_mb': summary.total_size_mb,
+            'total_duration_seconds': summary.total_duration_seconds,
+            'throughput_mb_per_second': summary.throughput_mb_per_second,
+        })
+        if (fastest is None or
+                summary.total_duration_seconds <
+                fastest.total_duration_seconds):
+            fastest = summary
+        if (highest is None or
+                summary.throughput_mb_per_second >
+                highest.throughput_mb_per_second):
+            highest = summary
+
+    if summaries:
+        comparison['fastest_table'] = fastest.table_name
+        comparison['highest_throughput_table'] = highest.table_name
+        comparison['highest_throughput_mb_per_second'] = \
+            highest.throughput_mb_per_second
+
+    return comparison
+
+
+def dump_comparison(summaries: List[TableLoadSummary], path: str):
+    """
+    Write the table summaries straight to a JSON file.
+
+    With orjson installed the dataclasses (including every per-batch
+    LoadResult and its datetimes) serialize directly in C, skipping
+    both the intermediate comparison dict and the asdict deep copy;
+    otherwise the stdlib json module is used with asdict.
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(summaries, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([asdict(summary) for summary in summaries], f,
+                      indent=2, default=str)